@@ -0,0 +1,259 @@
+import bisect
+import os
+import timeit
+from datetime import date, datetime, timedelta, timezone
+from typing import Annotated, Optional
+from uuid import UUID, uuid4
+
+from pydantic import AfterValidator, Field, TypeAdapter
+
+from example_4 import User
+
+"""
+This example demonstrates time-ordered user IDs and a user store partitioned by signup day.
+The User model of example_4.py uses random uuid4 IDs and keeps every user in a single list, so inserts land at
+random positions in any index sorted by ID, and a query for recent users has to visit every user.
+
+Key features:
+1. uuid7: generates UUIDv7-style IDs whose first 48 bits are a millisecond timestamp, so they sort by creation time.
+2. UserId: a relaxed UUID type (using Annotated and AfterValidator) that accepts both version 4 and version 7 UUIDs,
+   so existing random IDs remain valid.
+3. TimeOrderedUser: an optional subclass of the example_4 User that generates time-ordered IDs.
+4. PartitionedUserStore: users are stored in partitions keyed by signup day, each sorted by ID.
+   Recent-user queries only touch the latest partitions, lookups by id use an index from id to partition.
+5. Compaction: old partitions can be compacted into a single JSON blob and are only validated again when read.
+6. Benchmarks of insert locality and range-scan cost compared to random IDs and a single list.
+"""
+
+# UUID versions accepted as user IDs
+USER_ID_VERSIONS = (4, 7)
+
+
+def uuid7(timestamp: Optional[datetime] = None) -> UUID:
+    """Generate a UUIDv7-style ID with a millisecond timestamp followed by random bits."""
+    milliseconds = int((timestamp or datetime.now()).timestamp() * 1000)
+    value = milliseconds << 80 | int.from_bytes(os.urandom(10), "big")
+    # Set the version (7) and the RFC 4122 variant bits
+    value = value & ~(0xF << 76) | 7 << 76
+    value = value & ~(0b11 << 62) | 0b10 << 62
+    return UUID(int=value)
+
+
+def uuid7_timestamp(id: UUID) -> datetime:
+    """Return the creation time encoded in a UUIDv7-style ID."""
+    return datetime.fromtimestamp((id.int >> 80) / 1000)
+
+
+def validate_user_id(id: UUID) -> UUID:
+    if id.version not in USER_ID_VERSIONS:
+        raise ValueError(
+            f"User id must be a version {' or '.join(map(str, USER_ID_VERSIONS))} UUID"
+        )
+    return id
+
+
+UserId = Annotated[UUID, AfterValidator(validate_user_id)]
+
+# User model with time-ordered IDs, friends and blocked users may still have random IDs
+
+
+class TimeOrderedUser(User):
+    friends: list[UserId] = Field(
+        default_factory=list, max_length=500, description="List of friends"
+    )
+    blocked: list[UserId] = Field(
+        default_factory=list, max_length=500, description="List of blocked users"
+    )
+    id: UserId = Field(
+        default_factory=uuid7, description="Unique, time-ordered identifier", kw_only=True
+    )
+
+
+# Used to compact old partitions into a single JSON blob
+USER_LIST_ADAPTER = TypeAdapter(list[TimeOrderedUser])
+
+
+def local_time(timestamp: datetime) -> datetime:
+    """Convert timezone-aware timestamps to naive local time, like datetime.now() returns."""
+    if timestamp.tzinfo is None:
+        return timestamp
+    return timestamp.astimezone().replace(tzinfo=None)
+
+
+def signup_time(user: User) -> Optional[datetime]:
+    """Return the signup time of a user, falling back to the time in a time-ordered id."""
+    if user.signup_ts is not None:
+        return local_time(user.signup_ts)
+    if user.id.version == 7:
+        return uuid7_timestamp(user.id)
+    return None
+
+
+def partition_day(user: User) -> date:
+    """Return the signup day a user is stored under.
+
+    Users without a signup time (no signup_ts and a random id) are stored under date.min,
+    so they are never returned by recent-user queries.
+    """
+    timestamp = signup_time(user)
+    return date.min if timestamp is None else timestamp.date()
+
+# User store partitioned by signup day
+
+
+class PartitionedUserStore:
+    def __init__(self) -> None:
+        self.partitions: dict[date, list[TimeOrderedUser]] = {}
+        # Compacted partitions keep their row count, so they don't have to be validated to be counted
+        self.compacted: dict[date, tuple[int, bytes]] = {}
+        # Partitions are keyed by signup day, which can differ from the day in the id, so keep an index
+        self.days_by_id: dict[UUID, date] = {}
+
+    def __len__(self) -> int:
+        return sum(len(users) for users in self.partitions.values()) + sum(
+            count for count, _ in self.compacted.values()
+        )
+
+    def add(self, user: TimeOrderedUser) -> None:
+        if user.id in self.days_by_id:
+            raise ValueError(f"User {user.id} is already stored")
+        day = partition_day(user)
+        if day in self.compacted:
+            raise ValueError(f"Partition {day} is compacted and cannot be changed")
+        # With time-ordered IDs new users are (almost) always appended at the end
+        bisect.insort(self.partitions.setdefault(day, []), user, key=lambda u: u.id)
+        self.days_by_id[user.id] = day
+
+    def _users(self, day: date) -> list[TimeOrderedUser]:
+        # Internal reads use the stored list of live partitions directly
+        if day in self.compacted:
+            return USER_LIST_ADAPTER.validate_json(self.compacted[day][1])
+        return self.partitions.get(day, [])
+
+    def partition(self, day: date) -> list[TimeOrderedUser]:
+        """Return the users of a partition sorted by id.
+
+        Live partitions return a copy of the list with the stored users, compacted partitions are
+        validated again on every read and return new User instances.
+        """
+        users = self._users(day)
+        return list(users) if day in self.partitions else users
+
+    def days(self) -> list[date]:
+        return sorted(self.partitions.keys() | self.compacted.keys())
+
+    def recent(self, since: datetime) -> list[TimeOrderedUser]:
+        """Return the users that signed up since the given time, newest partitions first."""
+        since = local_time(since)
+        users = []
+        for day in reversed(self.days()):
+            if day < since.date():
+                break
+            users.extend(user for user in self._users(day) if signup_time(user) >= since)
+        return users
+
+    def get(self, user_id: UUID) -> Optional[TimeOrderedUser]:
+        # Only the partition that holds the user is read, a miss does not touch any partition
+        day = self.days_by_id.get(user_id)
+        if day is None:
+            return None
+        users = self._users(day)
+        index = bisect.bisect_left(users, user_id, key=lambda u: u.id)
+        return users[index] if index < len(users) and users[index].id == user_id else None
+
+    def compact(self, before: date) -> int:
+        """Compact all partitions before the given day, returning the number of compacted partitions."""
+        days = [day for day in self.partitions if day < before]
+        for day in days:
+            users = self.partitions.pop(day)
+            self.compacted[day] = (len(users), USER_LIST_ADAPTER.dump_json(users))
+        return len(days)
+
+
+def make_users(count: int, days: int, time_ordered: bool) -> list[TimeOrderedUser]:
+    # Signups spread evenly over the last days, in the order they happened
+    start = datetime.now() - timedelta(days=days)
+    step = timedelta(days=days) / count
+    users = []
+    for i in range(count):
+        signup_ts = start + i * step
+        users.append(
+            TimeOrderedUser(
+                name=f"User {i}",
+                email=f"example{i}@arjancodes.com",
+                signup_ts=signup_ts,
+                id=uuid7(signup_ts) if time_ordered else uuid4(),
+            )
+        )
+    return users
+
+
+def insert_displacement(users: list[TimeOrderedUser]) -> float:
+    """Average distance from the end of a sorted ID index at which new users are inserted (0 is append-only)."""
+    index: list[UUID] = []
+    total = 0.0
+    for user in users:
+        position = bisect.bisect(index, user.id)
+        total += (len(index) - position) / (len(index) or 1)
+        index.insert(position, user.id)
+    return total / len(users)
+
+
+def main() -> None:
+    user = TimeOrderedUser(name="User 0", email="example0@arjancodes.com")
+    assert user.id.version == 7, "The id should be time-ordered"
+    assert abs(uuid7_timestamp(user.id) - datetime.now()) < timedelta(seconds=1), "The id should encode the creation time"
+    assert TimeOrderedUser.model_validate_json(user.model_dump_json()) == user, "The id should round-trip"
+    assert TimeOrderedUser(name="User 1", email="example1@arjancodes.com", id=uuid4()).id.version == 4, "Random ids are still accepted"
+    assert uuid7() < uuid7(datetime.now() + timedelta(milliseconds=1)), "Later ids should sort after earlier ids"
+
+    random_users = make_users(5000, days=30, time_ordered=False)
+    ordered_users = make_users(5000, days=30, time_ordered=True)
+
+    # Insert locality: where do new users land in an index sorted by id?
+    print(f"Average insert displacement with uuid4: {insert_displacement(random_users):.3f}")
+    print(f"Average insert displacement with uuid7: {insert_displacement(ordered_users):.3f}")
+
+    store = PartitionedUserStore()
+    for user in ordered_users:
+        store.add(user)
+    assert len(store) == 5000, "All users should be stored"
+    assert store.get(ordered_users[1234].id) is ordered_users[1234], "The user should be found by id"
+
+    # Range scan: users that signed up in the last day
+    since = datetime.now() - timedelta(days=1)
+    expected = [user for user in ordered_users if user.signup_ts >= since]
+    assert sorted(u.id for u in store.recent(since)) == [u.id for u in expected], "Recent users should match"
+    number = 100
+    scan = min(timeit.repeat(lambda: [u for u in ordered_users if u.signup_ts >= since], number=number))
+    partitioned = min(timeit.repeat(lambda: store.recent(since), number=number))
+    visited = sum(len(store.partition(day)) for day in store.days() if day >= since.date())
+    print(f"Recent users, scanning all {len(ordered_users)} users: {scan / number * 1e6:.1f} us")
+    print(f"Recent users, scanning {visited} users in the latest partitions: {partitioned / number * 1e6:.1f} us")
+
+    # Compact everything older than a week, recent queries are unaffected
+    compacted = store.compact(date.today() - timedelta(days=7))
+    print(f"Compacted {compacted} partitions")
+    assert len(store) == 5000, "Compaction should keep all users"
+    assert len(store.recent(since)) == len(expected), "Recent users should not be affected by compaction"
+    assert store.get(ordered_users[0].id) == ordered_users[0], "Compacted users are validated again when read"
+    assert store.get(ordered_users[-1].id) is ordered_users[-1], "Live users are returned as stored"
+    assert store.get(uuid7()) is None, "An unknown id should not be found"
+    try:
+        store.add(ordered_users[-1])
+        raise AssertionError("Adding a user twice should be rejected")
+    except ValueError:
+        pass
+
+    # Timezone-aware signup timestamps are stored and queried in local time
+    aware = TimeOrderedUser(
+        name="User 5000", email="example5000@arjancodes.com", signup_ts=datetime.now(timezone.utc)
+    )
+    store.add(aware)
+    assert aware.id in {user.id for user in store.recent(datetime.now() - timedelta(days=2))}, (
+        "Users with timezone-aware signup timestamps should be found"
+    )
+
+
+if __name__ == "__main__":
+    main()
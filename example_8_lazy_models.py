@@ -0,0 +1,250 @@
+import copy
+import json
+import re
+import timeit
+from datetime import datetime
+from typing import Annotated, Any, Optional
+from uuid import uuid4
+
+from pydantic import BaseModel, EmailStr, Field, PrivateAttr, TypeAdapter, UUID4, model_validator
+
+from example_4 import User
+
+"""
+This example demonstrates a lazy, raw-JSON-backed variant of the User model from example_4.py.
+Most reads of a User only touch `name` and `id`, yet full validation always builds the
+`friends`/`blocked` UUID lists and parses `signup_ts`. The LazyUser defers that work:
+
+1. Eager scalar fields: name, email and id are validated up front. The JSON is parsed by pydantic-core,
+   a wrap model validator takes the heavy keys out before the scalar fields are validated.
+2. Lazy container fields: friends, blocked and signup_ts are kept unvalidated and are only validated
+   (with a TypeAdapter built from example_4's own field definitions) on first attribute access.
+   This works the same for model_validate_raw, model_validate and LazyUser(...).
+3. Memoization: a lazily validated value is cached in a private attribute, so it is validated at most once.
+4. Raw pass-through serialization: model_dump_json writes the raw JSON of untouched fields straight back out.
+   The raw JSON is only split into top-level segments (by the C json decoder) when it is dumped.
+5. Escape hatch: to_user() materializes a fully validated example_4 User when it is really needed.
+
+Note that validation errors in a lazy field are only raised when that field is first accessed.
+"""
+
+# Fields that are kept unvalidated until they are accessed
+LAZY_FIELDS = ("friends", "blocked", "signup_ts")
+
+WHITESPACE_REGEX = re.compile(r"\s*")
+JSON_DECODER = json.JSONDecoder()
+
+
+def field_adapter(name: str) -> TypeAdapter:
+    """Build a TypeAdapter for a field of example_4's User, carrying over only its constraints."""
+    field = User.model_fields[name]
+    if not field.metadata:
+        return TypeAdapter(field.annotation)
+    return TypeAdapter(Annotated[field.annotation, *field.metadata])
+
+
+# One TypeAdapter per lazy field, reusing the constraints declared on example_4's User
+LAZY_ADAPTERS = {name: field_adapter(name) for name in LAZY_FIELDS}
+
+# Default factories of the lazy fields, used when a field is missing from the input
+LAZY_DEFAULT_FACTORIES = {
+    name: User.model_fields[name].default_factory for name in LAZY_FIELDS
+}
+
+
+def split_raw_object(raw: bytes | str) -> dict[str, str]:
+    """Split a JSON object into its top-level keys and raw value segments.
+
+    The values are scanned by the C json decoder, so every segment is well-formed JSON.
+    """
+    text = raw.decode() if isinstance(raw, bytes) else raw
+    pos = WHITESPACE_REGEX.match(text).end()
+    if text[pos:pos + 1] != "{":
+        raise ValueError("Raw user data must be a JSON object")
+    segments: dict[str, str] = {}
+    pos = WHITESPACE_REGEX.match(text, pos + 1).end()
+    separator = "}" if text[pos:pos + 1] == "}" else ","
+    if separator == "}":
+        pos += 1
+    while separator == ",":
+        key, pos = JSON_DECODER.raw_decode(text, pos)
+        pos = WHITESPACE_REGEX.match(text, pos).end()
+        if not isinstance(key, str) or text[pos:pos + 1] != ":":
+            raise ValueError("Raw user data contains an invalid key")
+        start = WHITESPACE_REGEX.match(text, pos + 1).end()
+        _, end = JSON_DECODER.raw_decode(text, start)
+        segments[key] = text[start:end]
+        pos = WHITESPACE_REGEX.match(text, end).end()
+        separator = text[pos:pos + 1]
+        if separator not in (",", "}"):
+            raise ValueError("Raw user data is not a complete JSON object")
+        pos = WHITESPACE_REGEX.match(text, pos + 1).end()
+    if WHITESPACE_REGEX.match(text, pos).end() < len(text):
+        raise ValueError("Raw user data contains trailing data after the JSON object")
+    return segments
+
+# Lazy User model: scalar fields are validated eagerly, container fields on first access
+
+
+class LazyUser(BaseModel):
+    model_config = {
+        "extra": "forbid",
+    }
+    name: str = Field(..., description="Name of the user")
+    email: EmailStr = Field(..., description="Email address of the user")
+    id: UUID4 = Field(
+        default_factory=uuid4, description="Unique identifier", kw_only=True
+    )
+    _unvalidated: dict[str, Any] = PrivateAttr(default_factory=dict)
+    _parsed: dict[str, Any] = PrivateAttr(default_factory=dict)
+    _raw: Optional[bytes] = PrivateAttr(default=None)
+    _segments: Optional[dict[str, str]] = PrivateAttr(default=None)
+
+    @model_validator(mode="wrap")
+    @classmethod
+    def defer_lazy_fields(cls, data: Any, handler: Any) -> "LazyUser":
+        # Take the lazy fields out (for JSON input pydantic-core has already parsed them),
+        # so that only the scalar fields are validated now
+        if not isinstance(data, dict):
+            return handler(data)
+        data = dict(data)
+        lazy = {name: data.pop(name) for name in LAZY_FIELDS if name in data}
+        user = handler(data)
+        user._unvalidated = lazy
+        for name in LAZY_FIELDS:
+            if name not in lazy:
+                user._parsed[name] = LAZY_DEFAULT_FACTORIES[name]()
+        return user
+
+    @classmethod
+    def model_validate_raw(cls, raw: bytes | str) -> "LazyUser":
+        user = cls.model_validate_json(raw)
+        user._raw = raw.encode() if isinstance(raw, str) else raw
+        return user
+
+    def _load(self, name: str) -> Any:
+        # Validate the unvalidated value on first access and memoize the result
+        if name not in self._parsed:
+            self._parsed[name] = LAZY_ADAPTERS[name].validate_python(self._unvalidated[name])
+        return self._parsed[name]
+
+    def _raw_segments(self) -> dict[str, str]:
+        if self._raw is None:
+            return {}
+        if self._segments is None:
+            self._segments = split_raw_object(self._raw)
+        return self._segments
+
+    @property
+    def friends(self) -> list[UUID4]:
+        return self._load("friends")
+
+    @property
+    def blocked(self) -> list[UUID4]:
+        return self._load("blocked")
+
+    @property
+    def signup_ts(self) -> Optional[datetime]:
+        return self._load("signup_ts")
+
+    def __eq__(self, other: Any) -> bool:
+        # Compare the values, not which lazy fields happen to have been accessed
+        if not isinstance(other, LazyUser):
+            return NotImplemented
+        return self.model_dump() == other.model_dump()
+
+    def __copy__(self) -> "LazyUser":
+        # Copies must not share the memo dicts with the original
+        copied = super().__copy__()
+        copied._unvalidated = copy.deepcopy(self._unvalidated)
+        copied._parsed = copy.deepcopy(self._parsed)
+        return copied
+
+    def model_dump(self, **kwargs: Any) -> dict[str, Any]:
+        # Any serialization option other than the defaults needs the full model
+        if kwargs:
+            return self.to_user().model_dump(**kwargs)
+        values = super().model_dump()
+        return {
+            name: self._load(name) if name in LAZY_FIELDS else values[name]
+            for name in User.model_fields
+        }
+
+    def model_dump_json(self, **kwargs: Any) -> str:
+        # Any serialization option other than the defaults needs the full model
+        if kwargs:
+            return self.to_user().model_dump_json(**kwargs)
+        # The eager fields are serialized by pydantic, then split into segments as well
+        eager = split_raw_object(super().model_dump_json())
+        raw = self._raw_segments()
+        parts = []
+        for name in User.model_fields:
+            if name not in LAZY_FIELDS:
+                value = eager[name]
+            elif name not in self._parsed and name in raw:
+                # Untouched raw segments are passed straight through
+                value = raw[name]
+            else:
+                value = LAZY_ADAPTERS[name].dump_json(self._load(name)).decode()
+            parts.append(f"{json.dumps(name)}:{value}")
+        return "{" + ",".join(parts) + "}"
+
+    def to_user(self) -> User:
+        return User.model_validate(self.model_dump())
+
+
+def main() -> None:
+    raw = User(
+        name="Arjan",
+        email="example@arjancodes.com",
+        friends=[uuid4() for _ in range(500)],
+        blocked=[uuid4() for _ in range(100)],
+    ).model_dump_json().encode()
+
+    user = LazyUser.model_validate_raw(raw)
+    assert user.name == "Arjan", "The name should be validated eagerly"
+    assert user._parsed == {}, "No lazy field should be parsed yet"
+    assert user.model_dump_json().encode() == raw, "Untouched raw segments should be passed through"
+
+    assert len(user.friends) == 500, "Friends should be parsed on first access"
+    assert user.friends is user.friends, "Validated friends should be memoized"
+    assert "blocked" not in user._parsed, "Blocked should still be raw"
+    assert user.to_user() == User.model_validate_json(raw), "The full user should be the same"
+
+    user = LazyUser(name="Arjan", email="example@arjancodes.com")
+    assert user.friends == [], "The friends list should default to empty"
+    assert user.signup_ts, "The signup timestamp should be set"
+
+    user = LazyUser.model_validate_raw('{"name": "Zo\u00eb", "email": "zoe@arjancodes.com"}')
+    assert user.model_dump().keys() == User.model_fields.keys(), "model_dump should include the lazy fields"
+    assert user.model_dump_json() == user.to_user().model_dump_json(), "The json should match the full user"
+    for invalid in (
+        b'{"name": "Arjan", "email": "example@arjancodes.com"} trailing',
+        b'{"name": "Arjan", "email": "example@arjancodes.com", "friends": [abc"}',
+        b'{"name": "Arjan", "email": "example@arjancodes.com", "friends": [1,,]}',
+    ):
+        try:
+            LazyUser.model_validate_raw(invalid)
+            raise AssertionError("Invalid JSON should be rejected")
+        except ValueError:
+            pass
+
+    friend = uuid4()
+    user = LazyUser(name="Arjan", email="example@arjancodes.com", friends=[str(friend)])
+    assert user.friends == [friend], "Lazy fields should be accepted by the constructor"
+    original = LazyUser.model_validate_raw(raw)
+    copied = original.model_copy()
+    assert len(copied.friends) == 500 and "friends" not in original._parsed, "Copies should not share memoized fields"
+    assert copied == original, "Equality should not depend on which fields were accessed"
+
+    # Compare reading only name and id with full validation versus lazy validation.
+    # EmailStr validation (roughly 150 us) is paid by both paths, the lazy path skips validating the UUID lists.
+    number = 500
+    full = min(timeit.repeat(lambda: User.model_validate_json(raw).name, number=number))
+    lazy = min(timeit.repeat(lambda: LazyUser.model_validate_raw(raw).name, number=number))
+    print(f"Full validation: {full / number * 1e6:.1f} us per user")
+    print(f"Lazy validation: {lazy / number * 1e6:.1f} us per user")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import contextlib
+import io
+import random
+import timeit
+from collections import Counter
+from typing import Any, Iterable, Optional
+
+from pydantic import BaseModel, Field, ValidationError
+
+import example
+import example_2
+
+"""
+This example demonstrates bulk validation of a feed of records with an error budget.
+The validate() helpers in example.py and example_2.py render every ValidationError, which is fine for a
+single record but dominates the runtime (and floods the logs) when a bad feed of thousands of records arrives.
+
+Key features:
+1. ErrorBudget: a Pydantic model describing when to give up, either after a number of failures or
+   when the failure rate exceeds a threshold (only checked once enough records were seen).
+2. Fast-fail: validate_bulk stops consuming the feed as soon as the budget is exceeded.
+3. Aggregated errors: failures are counted per (field, error type) instead of printing every error.
+   The counters only use e.errors() without urls, context and input, most of the saving comes from not printing.
+4. Sampled examples: full error details are only built for a reservoir sample of the failures, with the context
+   turned into strings and sensitive input such as passwords redacted, so the report can be logged and serialized.
+5. BulkValidationReport: a summary of the run that can be printed instead of every individual error.
+"""
+
+# Location used for errors raised by model-level validators
+MODEL_LOCATION = "__model__"
+
+# Input of these fields is never kept in the sampled errors
+SENSITIVE_FIELDS = {"password"}
+REDACTED = "**********"
+
+
+class ErrorBudget(BaseModel):
+    max_failures: Optional[int] = Field(
+        default=None, ge=0, description="Abort after more than this many failures"
+    )
+    max_failure_rate: Optional[float] = Field(
+        default=None, ge=0, le=1, description="Abort when the failure rate exceeds this fraction"
+    )
+    min_records: int = Field(
+        default=100, ge=1, description="Number of records to see before the failure rate is checked"
+    )
+
+    def exceeded(self, processed: int, failed: int) -> bool:
+        if self.max_failures is not None and failed > self.max_failures:
+            return True
+        if self.max_failure_rate is not None and processed >= self.min_records:
+            return failed / processed > self.max_failure_rate
+        return False
+
+
+class BulkValidationReport(BaseModel):
+    valid: list[BaseModel] = Field(default_factory=list)
+    processed: int = 0
+    failed: int = 0
+    aborted: bool = False
+    error_counts: dict[tuple[str, str], int] = Field(
+        default_factory=dict, description="Number of errors per (field, error type)"
+    )
+    samples: list[list[dict[str, Any]]] = Field(
+        default_factory=list, description="Full error details of a random sample of failed records"
+    )
+
+    def summary(self) -> str:
+        status = "aborted" if self.aborted else "completed"
+        lines = [f"Validation {status}: {self.failed} of {self.processed} records failed"]
+        for (field, error_type), count in sorted(
+            self.error_counts.items(), key=lambda item: item[1], reverse=True
+        ):
+            lines.append(f"  {field}: {error_type} x{count}")
+        return "\n".join(lines)
+
+# Helpers to keep sampled errors safe to log and serialize
+
+
+def redact(value: Any, loc: tuple[Any, ...] = ()) -> Any:
+    if loc and loc[-1] in SENSITIVE_FIELDS:
+        return REDACTED
+    if isinstance(value, dict):
+        return {key: redact(item, (key,)) for key, item in value.items()}
+    return value
+
+
+def sample_errors(e: ValidationError) -> list[dict[str, Any]]:
+    errors = e.errors(include_url=False)
+    for error in errors:
+        error["input"] = redact(error["input"], error["loc"])
+        if "ctx" in error:
+            error["ctx"] = {key: str(value) for key, value in error["ctx"].items()}
+    return errors
+
+# Bulk validation function with an error budget
+
+
+def validate_bulk(
+    model: type[BaseModel],
+    records: Iterable[dict[str, Any]],
+    budget: Optional[ErrorBudget] = None,
+    sample_size: int = 5,
+    seed: Optional[int] = None,
+) -> BulkValidationReport:
+    if budget is None:
+        budget = ErrorBudget()
+    rng = random.Random(seed)
+    valid = []
+    error_counts: Counter[tuple[str, str]] = Counter()
+    samples: list[list[dict[str, Any]]] = []
+    processed = failed = 0
+    aborted = False
+
+    for record in records:
+        processed += 1
+        try:
+            valid.append(model.model_validate(record))
+            continue
+        except ValidationError as e:
+            failed += 1
+            # Only the location and type are needed for counting, so skip the expensive parts
+            for error in e.errors(include_url=False, include_context=False, include_input=False):
+                field = ".".join(str(part) for part in error["loc"]) or MODEL_LOCATION
+                error_counts[field, error["type"]] += 1
+            # Reservoir sampling keeps a uniform sample of the failures seen so far,
+            # full error details are only built for the failures that enter the sample
+            if len(samples) < sample_size:
+                samples.append(sample_errors(e))
+            elif (index := rng.randrange(failed)) < sample_size:
+                samples[index] = sample_errors(e)
+        if budget.exceeded(processed, failed):
+            aborted = True
+            break
+
+    return BulkValidationReport(
+        valid=valid,
+        processed=processed,
+        failed=failed,
+        aborted=aborted,
+        error_counts=dict(error_counts),
+        samples=samples,
+    )
+
+
+def make_feed(size: int, failure_rate: float, seed: int = 42) -> list[dict[str, Any]]:
+    rng = random.Random(seed)
+    good = {
+        "name": "Arjan",
+        "email": "example@arjancodes.com",
+        "password": "Password123",
+    }
+    bad = [
+        {"email": "<bad data>", "password": "<bad data>"},
+        {"name": "Arjan", "email": "bad email", "password": "bad password"},
+        {"name": "Arjan", "email": "example@arjancodes.com", "password": "Arjan123"},
+    ]
+    return [
+        dict(rng.choice(bad)) if rng.random() < failure_rate else dict(good)
+        for _ in range(size)
+    ]
+
+
+def main() -> None:
+    feed = make_feed(2000, failure_rate=0.3)
+
+    # Validate the complete feed, aggregating the errors instead of printing them
+    for model in (example.User, example_2.User):
+        report = validate_bulk(model, [dict(record) for record in feed], seed=0)
+        print(f"{model.__module__}.User")
+        print(report.summary())
+        print(f"Sample error: {report.samples[0][0]}")
+        print()
+        assert report.model_dump_json(include={"samples"}), "The sampled errors should be serializable"
+        assert all(
+            error["input"]["password"] == REDACTED
+            for errors in report.samples
+            for error in errors
+            if isinstance(error["input"], dict) and "password" in error["input"]
+        ), "Passwords should be redacted in the sampled errors"
+
+    # Abort early on a bad feed
+    report = validate_bulk(example.User, feed, ErrorBudget(max_failures=10))
+    assert report.aborted, "The feed should be aborted after 11 failures"
+    assert report.failed == 11, "The budget allows 10 failures"
+    report = validate_bulk(example.User, feed, ErrorBudget(max_failure_rate=0.1))
+    assert report.aborted, "The feed should be aborted because of the failure rate"
+    assert report.processed >= 100, "The failure rate is only checked after 100 records"
+    report = validate_bulk(example.User, make_feed(500, failure_rate=0), ErrorBudget(max_failures=0))
+    assert not report.aborted, "A clean feed should not be aborted"
+    assert len(report.valid) == 500, "All users should be valid"
+
+    # Compare the validate() helper of example.py with bulk validation on a completely bad feed
+    bad_feed = make_feed(1000, failure_rate=1)
+    number = 3
+    with contextlib.redirect_stdout(io.StringIO()):
+        printed = min(timeit.repeat(lambda: [example.validate(record) for record in bad_feed], number=number))
+    aggregated = min(timeit.repeat(lambda: validate_bulk(example.User, bad_feed), number=number))
+    aborted = min(
+        timeit.repeat(lambda: validate_bulk(example.User, bad_feed, ErrorBudget(max_failures=10)), number=number)
+    )
+    print(f"Printing every error: {printed / number * 1e3:.1f} ms per feed")
+    print(f"Aggregating errors: {aggregated / number * 1e3:.1f} ms per feed")
+    print(f"Aborting after 10 failures: {aborted / number * 1e3:.1f} ms per feed")
+
+
+if __name__ == "__main__":
+    main()